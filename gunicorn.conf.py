@@ -0,0 +1,18 @@
+"""
+Gunicorn settings for running the API with multiple Uvicorn workers.
+
+Usage: gunicorn main:app
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WORKERS", multiprocessing.cpu_count()))
+worker_class = "workers.BoundedUvicornWorker"
+accesslog = "-"
+loglevel = "warning"
+backlog = 2048
+keepalive = 5
+max_requests = 10000
+max_requests_jitter = 1000
@@ -1,49 +1,183 @@
 import os
+import logging
+import re
+import time
+import asyncio
+import secrets
+from functools import lru_cache
 from datetime import datetime, timezone
-from fastapi import FastAPI, HTTPException, Depends
+import orjson
+from fastapi import FastAPI, HTTPException, Depends, Body
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from typing import List, Optional, Dict, Any
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import List, Optional, Dict, Any, Tuple
 from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
 from passlib.context import CryptContext
+import jwt
 
 from database import db, create_document, get_documents
-from schemas import UserRegister, UserLogin, User, Department, Task, TaskUpdateEntry
-
-app = FastAPI(title="Trimkart API", version="1.0.0")
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+from schemas import UserRegister, UserLogin, User, Department, Task, TaskUpdateEntry, TaskStatus, MAX_TASK_UPDATES
+
+
+def _orjson_default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError
+
+
+class MongoJSONResponse(ORJSONResponse):
+    """orjson response that also serializes ObjectId values as hex strings"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+app = FastAPI(title="Trimkart API", version="1.0.0", default_response_class=MongoJSONResponse)
+
+logger = logging.getLogger(__name__)
+
+# Opt-in for permissive local development defaults; never set this in a deployment
+DEV_MODE = os.getenv("DEV_MODE", "").lower() in ("1", "true", "yes")
+
+# Comma-separated list of allowed browser origins. Set it to an empty string to run
+# without CORS (e.g. behind a trusted proxy); leaving it unset allows any origin only in DEV_MODE.
+frontend_origin_env = os.getenv("FRONTEND_ORIGIN")
+if frontend_origin_env is None:
+    frontend_origins = ["*"] if DEV_MODE else []
+    if not DEV_MODE:
+        logger.warning("FRONTEND_ORIGIN is not set; CORS is disabled and cross-origin browser requests will fail")
+else:
+    frontend_origins = [o.strip() for o in frontend_origin_env.split(",") if o.strip()]
+
+if frontend_origins:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=frontend_origins,
+        allow_credentials=True,
+        allow_methods=["GET", "POST"],
+        allow_headers=["authorization", "content-type"],
+    )
+
+security = HTTPBearer()
+UTC = timezone.utc
+# Tokens must verify on every worker and survive restarts, so the key has to come from the environment;
+# a random per-process key is only acceptable in DEV_MODE
+JWT_SECRET = os.getenv("JWT_SECRET")
+if not JWT_SECRET:
+    if not DEV_MODE:
+        raise RuntimeError("JWT_SECRET is not set. Set it, or set DEV_MODE=1 to use a temporary random key.")
+    logger.warning("JWT_SECRET is not set; using a random key, tokens will not survive restarts")
+    JWT_SECRET = secrets.token_urlsafe(32)
+JWT_ALGORITHM = "HS256"
+JWT_EXPIRE_SECONDS = int(os.getenv("JWT_EXPIRE_MINUTES", 60)) * 60
+# argon2id for new hashes; bcrypt kept so existing hashes still verify
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=2,
+    argon2__memory_cost=19456,
+    argon2__parallelism=1,
 )
-
-security = HTTPBasic()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Verified against when the user is missing so login timing does not reveal which emails exist
+DUMMY_PASSWORD_HASH = pwd_context.hash("dummy-password")
+
+# Fields returned by list_tasks; description and updates history are left out
+TASK_LIST_FIELDS = {
+    "title": 1,
+    "status": 1,
+    "assigned_to": 1,
+    "assigned_by": 1,
+    "department_id": 1,
+    "due_date": 1,
+    "progress": 1,
+    "created_at": 1,
+}
+
+# Pipeline stages that expose _id as a string "id" field, so list handlers need no per-document rewrite
+ID_AS_STRING = [{"$addFields": {"id": {"$toString": "$_id"}}}, {"$unset": "_id"}]
+
+# Fields login needs to verify the password and build its response
+LOGIN_FIELDS = {"password_hash": 1, "name": 1, "email": 1, "role": 1, "department_id": 1}
+
+# Upper bound on tasks accepted by one POST /tasks/bulk request
+MAX_BULK_TASKS = 500
 
 # Helpers
 
+_OID_RE = re.compile(r"[0-9a-fA-F]{24}")
+
+
+@lru_cache(maxsize=4096)
 def oid(id_str: str) -> ObjectId:
-    try:
-        return ObjectId(id_str)
-    except Exception:
+    if not _OID_RE.fullmatch(id_str):
         raise HTTPException(status_code=400, detail="Invalid id format")
+    return ObjectId(id_str)
+
+
+def create_access_token(user: Dict[str, Any]) -> str:
+    now = int(time.time())
+    claims = {"sub": user["id"], "role": user.get("role"), "iat": now, "exp": now + JWT_EXPIRE_SECONDS}
+    return jwt.encode(claims, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
-def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
-    user = db["user"].find_one({"email": email})
+@lru_cache(maxsize=8192)
+def decode_access_token(token: str) -> Dict[str, Any]:
+    # Only successful decodes are cached; expiry is re-checked by the caller on every hit
+    try:
+        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+
+async def get_current_claims(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
+    claims = decode_access_token(credentials.credentials)
+    if claims["exp"] <= time.time():
+        raise HTTPException(status_code=401, detail="Token expired")
+    return claims
+
+
+async def get_user_by_email(email: str, projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    user = await db["user"].find_one({"email": email}, projection=projection)
     return user
 
 
+# Match the query shapes of list_tasks, list_users and get_user_by_email
+INDEXES = [
+    ("task", [("status", 1), ("assigned_to", 1), ("department_id", 1), ("created_at", -1)], {}),
+    ("user", "email", {"unique": True}),
+    ("user", [("role", 1), ("department_id", 1)], {}),
+]
+_index_task: Optional[asyncio.Task] = None
+
+
+async def build_indexes():
+    for collection, keys, options in INDEXES:
+        try:
+            await db[collection].create_index(keys, **options)
+        except PyMongoError as e:
+            # e.g. database unreachable, or duplicate emails blocking the unique index
+            logger.error("Could not create index %r on %s: %s", keys, collection, e)
+
+
+@app.on_event("startup")
+async def ensure_indexes():
+    # Built in the background so an unreachable database does not delay or prevent startup
+    global _index_task
+    if db is None:
+        return
+    _index_task = asyncio.create_task(build_indexes())
+
+
 @app.get("/")
-def root():
+async def root():
     return {"message": "Trimkart backend is running"}
 
 
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -59,7 +193,7 @@ def test_database():
             response["database_name"] = getattr(db, 'name', '✅ Connected')
             response["connection_status"] = "Connected"
             try:
-                response["collections"] = db.list_collection_names()[:10]
+                response["collections"] = (await db.list_collection_names())[:10]
                 response["database"] = "✅ Connected & Working"
             except Exception as e:
                 response["database"] = f"⚠️  Connected but Error: {str(e)[:50]}"
@@ -73,83 +207,127 @@ def test_database():
     return response
 
 
-# Auth endpoints (HTTP Basic for demo; can be swapped for JWT later)
+# Auth endpoints (login issues an HS256 JWT bearer token)
 @app.post("/auth/register")
-def register(payload: UserRegister):
-    if get_user_by_email(payload.email):
+async def register(payload: UserRegister):
+    if await get_user_by_email(payload.email, projection={"_id": 1}):
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed = pwd_context.hash(payload.password)
+    hashed = await asyncio.to_thread(pwd_context.hash, payload.password)
+    now = datetime.now(UTC)
     doc = {
         "name": payload.name,
         "email": payload.email,
         "password_hash": hashed,
         "role": payload.role,
         "department_id": payload.department_id,
-        "created_at": datetime.now(timezone.utc),
-        "updated_at": datetime.now(timezone.utc),
+        "created_at": now,
+        "updated_at": now,
     }
-    inserted_id = db["user"].insert_one(doc).inserted_id
+    try:
+        inserted_id = (await db["user"].insert_one(doc)).inserted_id
+    except DuplicateKeyError:
+        # A concurrent registration for the same email won the unique index race
+        raise HTTPException(status_code=400, detail="Email already registered")
     return {"id": str(inserted_id), "message": "Registered successfully"}
 
 
 @app.post("/auth/login")
-def login(payload: UserLogin):
-    user = get_user_by_email(payload.email)
-    if not user or not pwd_context.verify(payload.password, user.get("password_hash", "")):
+async def login(payload: UserLogin):
+    user = await get_user_by_email(payload.email, projection=LOGIN_FIELDS)
+    password_hash = user.get("password_hash") if user else None
+    ok, new_hash = await asyncio.to_thread(pwd_context.verify_and_update, payload.password, password_hash or DUMMY_PASSWORD_HASH)
+    if not user or not password_hash or not ok:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    # For simplicity, return user info; in production return JWT
+    if new_hash:
+        # Upgrade legacy bcrypt hashes to argon2id now that the plaintext is known to be correct
+        await db["user"].update_one({"_id": user["_id"]}, {"$set": {"password_hash": new_hash, "updated_at": datetime.now(UTC)}})
     user["id"] = str(user.pop("_id"))
     user.pop("password_hash", None)
-    return {"message": "Login successful", "user": user}
+    return {
+        "message": "Login successful",
+        "user": user,
+        "access_token": create_access_token(user),
+        "token_type": "bearer",
+    }
+
+
+@app.get("/auth/me")
+async def me(claims: Dict[str, Any] = Depends(get_current_claims)):
+    user = await db["user"].find_one({"_id": oid(claims["sub"])}, projection={"password_hash": 0})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    user["id"] = str(user.pop("_id"))
+    return user
 
 
 # Departments
 @app.post("/departments")
-def create_department(dep: Department):
+async def create_department(dep: Department):
     data = dep.model_dump()
-    inserted_id = db["department"].insert_one({
-        **data,
-        "created_at": datetime.now(timezone.utc),
-        "updated_at": datetime.now(timezone.utc),
-    }).inserted_id
+    now = datetime.now(UTC)
+    data["created_at"] = now
+    data["updated_at"] = now
+    inserted_id = (await db["department"].insert_one(data)).inserted_id
     return {"id": str(inserted_id)}
 
 
-@app.get("/departments")
-def list_departments():
-    deps = list(db["department"].find().sort("name"))
-    for d in deps:
-        d["id"] = str(d.pop("_id"))
-    return deps
+@app.get("/departments", response_model=None)
+async def list_departments():
+    pipeline = [{"$sort": {"name": 1}}, *ID_AS_STRING]
+    deps = await db["department"].aggregate(pipeline).to_list(length=None)
+    return MongoJSONResponse(deps)
 
 
 # Users
-@app.get("/users")
-def list_users(role: Optional[str] = None, department_id: Optional[str] = None):
+@app.get("/users", response_model=None)
+async def list_users(role: Optional[str] = None, department_id: Optional[str] = None):
     query: Dict[str, Any] = {}
     if role:
         query["role"] = role
     if department_id:
         query["department_id"] = department_id
-    users = list(db["user"].find(query))
-    for u in users:
-        u["id"] = str(u.pop("_id"))
-        u.pop("password_hash", None)
-    return users
+    pipeline = [{"$match": query}, {"$unset": "password_hash"}, *ID_AS_STRING]
+    users = await db["user"].aggregate(pipeline).to_list(length=None)
+    return MongoJSONResponse(users)
 
 
 # Tasks
 @app.post("/tasks")
-def create_task(task: Task):
+async def create_task(task: Task):
     data = task.model_dump()
-    data["created_at"] = datetime.now(timezone.utc)
-    data["updated_at"] = datetime.now(timezone.utc)
-    inserted_id = db["task"].insert_one(data).inserted_id
+    now = datetime.now(UTC)
+    data["created_at"] = now
+    data["updated_at"] = now
+    inserted_id = (await db["task"].insert_one(data)).inserted_id
     return {"id": str(inserted_id)}
 
 
-@app.get("/tasks")
-def list_tasks(status: Optional[str] = None, assigned_to: Optional[str] = None, department_id: Optional[str] = None):
+@app.post("/tasks/bulk")
+async def create_tasks(tasks: List[Task] = Body(..., max_length=MAX_BULK_TASKS)):
+    if not tasks:
+        raise HTTPException(status_code=400, detail="No tasks provided")
+    now = datetime.now(UTC)
+    docs = []
+    for t in tasks:
+        data = t.model_dump()
+        data["created_at"] = now
+        data["updated_at"] = now
+        docs.append(data)
+    try:
+        result = await db["task"].insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        # Unordered inserts keep going past failures; report what landed and what did not
+        errors = e.details.get("writeErrors", [])
+        failed = {err["index"] for err in errors}
+        return MongoJSONResponse(status_code=207, content={
+            "ids": [str(d["_id"]) for i, d in enumerate(docs) if i not in failed],
+            "errors": [{"index": err["index"], "message": err.get("errmsg")} for err in errors],
+        })
+    return {"ids": [str(i) for i in result.inserted_ids]}
+
+
+@app.get("/tasks", response_model=None)
+async def list_tasks(status: Optional[str] = None, assigned_to: Optional[str] = None, department_id: Optional[str] = None):
     query: Dict[str, Any] = {}
     if status:
         query["status"] = status
@@ -157,41 +335,69 @@ def list_tasks(status: Optional[str] = None, assigned_to: Optional[str] = None,
         query["assigned_to"] = assigned_to
     if department_id:
         query["department_id"] = department_id
-    tasks = list(db["task"].find(query).sort("created_at", -1))
-    for t in tasks:
-        t["id"] = str(t.pop("_id"))
-    return tasks
+    pipeline = [{"$match": query}, {"$sort": {"created_at": -1}}, {"$project": TASK_LIST_FIELDS}, *ID_AS_STRING]
+    tasks = await db["task"].aggregate(pipeline).to_list(length=None)
+    return MongoJSONResponse(tasks)
 
 
 @app.post("/tasks/{task_id}/update")
-def add_task_update(task_id: str, update: TaskUpdateEntry):
+async def add_task_update(task_id: str, update: TaskUpdateEntry):
     upd = update.model_dump()
+    now = datetime.now(UTC)
     if not upd.get("created_at"):
-        upd["created_at"] = datetime.now(timezone.utc)
-    res = db["task"].update_one({"_id": oid(task_id)}, {"$push": {"updates": upd}, "$set": {"updated_at": datetime.now(timezone.utc)}})
+        upd["created_at"] = now
+    res = await db["task"].update_one({"_id": oid(task_id)}, {"$push": {"updates": {"$each": [upd], "$slice": -MAX_TASK_UPDATES}}, "$set": {"updated_at": now}})
     if res.matched_count == 0:
         raise HTTPException(status_code=404, detail="Task not found")
     return {"message": "Update added"}
 
 
 @app.post("/tasks/{task_id}/status")
-def set_task_status(task_id: str, status: str):
-    if status not in ["PENDING", "IN_PROGRESS", "COMPLETED"]:
-        raise HTTPException(status_code=400, detail="Invalid status")
-    res = db["task"].update_one({"_id": oid(task_id)}, {"$set": {"status": status, "updated_at": datetime.now(timezone.utc)}})
+async def set_task_status(task_id: str, status: TaskStatus):
+    res = await db["task"].update_one({"_id": oid(task_id)}, {"$set": {"status": status, "updated_at": datetime.now(UTC)}})
     if res.matched_count == 0:
         raise HTTPException(status_code=404, detail="Task not found")
     return {"message": "Status updated"}
 
 
 # Simple analytics endpoints
+ANALYTICS_TTL_SECONDS = 5.0
+_analytics_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_analytics_lock = asyncio.Lock()
+
+
 @app.get("/analytics/overview")
-def analytics_overview():
-    total_users = db["user"].count_documents({})
-    total_tasks = db["task"].count_documents({})
-    completed = db["task"].count_documents({"status": "COMPLETED"})
-    in_progress = db["task"].count_documents({"status": "IN_PROGRESS"})
-    pending = db["task"].count_documents({"status": "PENDING"})
+async def analytics_overview():
+    # Dashboards poll this endpoint; serve counters up to ANALYTICS_TTL_SECONDS old from memory
+    cached = _analytics_cache.get("overview")
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    async with _analytics_lock:
+        cached = _analytics_cache.get("overview")
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        overview = await compute_overview()
+        _analytics_cache["overview"] = (time.monotonic() + ANALYTICS_TTL_SECONDS, overview)
+        return overview
+
+
+async def compute_overview() -> Dict[str, Any]:
+    pipeline = [{"$facet": {
+        "total": [{"$count": "n"}],
+        "completed": [{"$match": {"status": "COMPLETED"}}, {"$count": "n"}],
+        "in_progress": [{"$match": {"status": "IN_PROGRESS"}}, {"$count": "n"}],
+        "pending": [{"$match": {"status": "PENDING"}}, {"$count": "n"}],
+    }}]
+    # The facet already scans every task, so its exact total keeps completion_rate consistent
+    total_users, facets = await asyncio.gather(
+        db["user"].estimated_document_count(),
+        db["task"].aggregate(pipeline).to_list(1),
+    )
+    counts = {k: (v[0]["n"] if v else 0) for k, v in facets[0].items()}
+    total_tasks = counts["total"]
+    completed = counts["completed"]
+    in_progress = counts["in_progress"]
+    pending = counts["pending"]
     return {
         "users": total_users,
         "tasks": total_tasks,
@@ -205,4 +411,15 @@ def analytics_overview():
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        access_log=False,
+        proxy_headers=False,
+        limit_concurrency=1000,
+        timeout_keep_alive=5,
+        backlog=2048,
+    )
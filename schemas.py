@@ -5,13 +5,16 @@ Each Pydantic model maps to a MongoDB collection (lowercased class name).
 Use these schemas for input validation in API routes.
 """
 
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
 from typing import Optional, List, Literal
 from datetime import datetime
 
 RoleType = Literal["MD", "CEO", "COO", "MANAGER", "EMPLOYEE"]
 TaskStatus = Literal["PENDING", "IN_PROGRESS", "COMPLETED"]
 
+# Only the most recent entries of a task's updates history are kept
+MAX_TASK_UPDATES = 100
+
 class Department(BaseModel):
     name: str = Field(..., description="Department name")
     description: Optional[str] = Field(None, description="Department description")
@@ -25,6 +28,9 @@ class User(BaseModel):
     # password is handled separately; we store hashes in DB, not via schema
 
 class UserRegister(BaseModel):
+    # No whitespace stripping here: it would silently alter passwords
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     name: str
     email: EmailStr
     password: str
@@ -36,12 +42,16 @@ class UserLogin(BaseModel):
     password: str
 
 class TaskUpdateEntry(BaseModel):
+    model_config = ConfigDict(extra="forbid", frozen=True, str_strip_whitespace=True)
+
     user_id: str
     note: Optional[str] = None
     progress: Optional[int] = Field(None, ge=0, le=100)
     created_at: Optional[datetime] = None
 
 class Task(BaseModel):
+    model_config = ConfigDict(extra="forbid", frozen=True, str_strip_whitespace=True)
+
     title: str
     description: Optional[str] = None
     assigned_to: str = Field(..., description="User id (stringified ObjectId)")
@@ -50,4 +60,4 @@ class Task(BaseModel):
     status: TaskStatus = "PENDING"
     due_date: Optional[datetime] = None
     progress: int = Field(0, ge=0, le=100)
-    updates: List[TaskUpdateEntry] = []
+    updates: List[TaskUpdateEntry] = Field(default_factory=list, max_length=MAX_TASK_UPDATES)
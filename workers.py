@@ -0,0 +1,12 @@
+"""
+Gunicorn worker classes for the API.
+
+UvicornWorker maps gunicorn's keepalive, backlog and max_requests settings but not
+limit_concurrency, so the per-worker cap on in-flight requests is set here.
+"""
+
+from uvicorn.workers import UvicornWorker
+
+
+class BoundedUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {"loop": "auto", "http": "auto", "limit_concurrency": 1000}